@@ -11,37 +11,111 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
+import ast
+import importlib
 import inspect
+import json
 import logging
 import os
 import pkgutil
 import sys
-import traceback
+import threading
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Any, NamedTuple
+from typing import Any, DefaultDict, Dict, Iterator, List, Optional, Set, Tuple
 
 from providah.factories.providah_error import ProvidahError
 
 
-class Entry(NamedTuple):
+@dataclass(frozen=True)
+class Entry:
     """
     Registry entry.
     """
+    __slots__ = ('key', 'class_def', 'library', 'label')
+
     key: str
     class_def: type
-    library: str
-    label: str
+    library: Optional[str]
+    label: Optional[str]
+
+
+class LazyClass:
+    """
+    Stand-in for a class definition, which is only imported the first time it is used to construct an instance.
+    """
+
+    def __init__(self, module_name: str, qualname: str, filename: str = None):
+        """
+        Construct LazyClass
+        Args:
+            module_name: name of the module where the class is defined
+            qualname: qualified name of the class within the module
+            filename: source file of the module, if known
+        """
+        self.module_name = module_name
+        self.qualname = qualname
+        self.filename = filename
+        self.__class_def = None
+
+    def resolve(self) -> type:
+        """
+        Import the module and look up the class definition. The result is memoized.
+        Returns:
+            The class definition.
+
+        Raises:
+            ProvidahError
+        """
+        if self.__class_def is None:
+            try:
+                class_def = importlib.import_module(self.module_name)
+                for name in self.qualname.split('.'):
+                    class_def = getattr(class_def, name)
+            except Exception as error:
+                error_message = "The class %s could not be resolved from module %s: %s"
+                logging.getLogger().exception(error_message, self.qualname, self.module_name, error)
+                raise ProvidahError(error_message, format_args=(self.qualname, self.module_name, error)) from error
+
+            self.__class_def = class_def
+
+        return self.__class_def
+
+    def __call__(self, **kwargs) -> Any:
+        return self.resolve()(**kwargs)
 
 
-# noinspection BuiltinExec
 class PackageFactory:
     """
     PackageFactory is a factory designed to store class definitions and keys to access them (and then construct with a configuration) without having to
     explicitly build this factory. This will make coding cleaner - remove the necessity to build and maintain a factory. If you need specifically typed
     factories, then this factory can be inherited from and a duck-typing filter applied to limit to only the classes of interest.
     """
-    # This is the registry of packages
-    __registry = []
+    # This is the registry of packages, indexed by key, then by the (library, label) combination and then by the module
+    # and qualified name of the class - distinct classes found under the same combination are kept so that they are
+    # reported as ambiguous.
+    __registry: Dict[str, Dict[Tuple[str, str], Dict[Tuple[str, str], Entry]]] = {}
+
+    # Secondary indices of the (library, label) combinations registered for a (key, library) and a (key, label). The
+    # combinations are kept as the keys of a dict - an insertion ordered set.
+    __library_index: DefaultDict[Tuple[str, str], Dict[Tuple[str, str], None]] = defaultdict(dict)
+    __label_index: DefaultDict[Tuple[str, str], Dict[Tuple[str, str], None]] = defaultdict(dict)
+
+    # Modules already added to the registry, along with the library and label they were registered under
+    __imported_packages: Set[Tuple[str, str, str]] = set()
+
+    # Modules already added to the registry lazily, from their parsed source. Kept apart from the imported modules so that
+    # an eager fill still replaces the lazy placeholders.
+    __parsed_packages: Set[Tuple[str, str, str]] = set()
+
+    # Class definitions already resolved by create, keyed by the normalized key, library and label. Cleared whenever the
+    # registry changes.
+    __resolved: Dict[Tuple[str, Optional[str], Optional[str]], type] = {}
+
+    # Serializes changes to the registry - modules imported on other threads may register classes
+    __lock = threading.RLock()
 
     # Logger instance using the global settings
     __logger = logging.getLogger()
@@ -53,7 +127,7 @@ class PackageFactory:
                  library: str = None,
                  label: str = None) -> None:
         """
-        Register a class with the factory.
+        Register a class with the factory. Any class previously registered for the key, library and label is replaced.
         Args:
             key: name used to reference the class
             class_def: class that can be used to instantiate an instance of the class
@@ -61,14 +135,84 @@ class PackageFactory:
             label: label used to identify a class - possible linked to a monkey-patched version or a sub-application specific class.
 
         """
-        new_entry = Entry(key=key.lower(),
-                          class_def=class_def,
-                          library=str(library).lower(),
-                          label=str(label).lower())
+        cls.__add_entries([Entry(key=cls.__normalize(key),
+                                 class_def=class_def,
+                                 library=cls.__normalize(library),
+                                 label=cls.__normalize(label))],
+                            replace=True)
+
+    @classmethod
+    def __add_entries(cls, entries: List[Entry], replace: bool = False) -> None:
+        """
+        Add a batch of entries to the registry.
+        Args:
+            entries: entries with normalized names
+            replace: when True, the entry replaces every class registered for its key, library and label. Otherwise it is
+                     added alongside them, unless the same class is already registered.
+
+        """
+        with cls.__lock:
+            for new_entry in entries:
+                pair = (new_entry.library, new_entry.label)
+                bucket = cls.__registry.setdefault(new_entry.key, {})
+                pair_entries = bucket.get(pair)
+                if replace or pair_entries is None:
+                    pair_entries = bucket[pair] = {}
+
+                # The same class found again replaces its entry - prevents duplicate entry - but an imported class is
+                # kept over a lazy placeholder for it.
+                class_path = cls.__class_path(new_entry.class_def)
+                existing_entry = pair_entries.get(class_path)
+                if existing_entry is None or not isinstance(new_entry.class_def, LazyClass) or isinstance(existing_entry.class_def, LazyClass):
+                    pair_entries[class_path] = new_entry
+
+                cls.__library_index[(new_entry.key, new_entry.library)][pair] = None
+                cls.__label_index[(new_entry.key, new_entry.label)][pair] = None
+
+            # Previously resolved lookups may now be ambiguous or resolve to another class.
+            cls.__resolved.clear()
+
+    @staticmethod
+    def __class_path(class_def: type) -> Tuple[str, str]:
+        """
+        Identify a class definition by its module and qualified name.
+        Args:
+            class_def: class definition or lazy placeholder for one
 
-        # Add entry if it is not currently present. Prevents duplicate entry.
-        if new_entry not in cls.__registry:
-            cls.__registry.append(new_entry)
+        Returns:
+            The module name and qualified name of the class.
+        """
+        if isinstance(class_def, LazyClass):
+            return class_def.module_name, class_def.qualname
+
+        return getattr(class_def, '__module__', None), getattr(class_def, '__qualname__', repr(class_def))
+
+    @staticmethod
+    def __normalize(name: Optional[str]) -> Optional[str]:
+        """
+        Normalize a key, library or label for the registry. Names are interned so that registry lookups can compare them
+        by identity.
+        Args:
+            name: name to normalize
+
+        Returns:
+            The lowercase, interned name, or None when no name was given.
+        """
+        return sys.intern(name.lower()) if name else None
+
+    @classmethod
+    def clear_registry(cls) -> None:
+        """
+        Remove every class from the registry. Packages which were already walked are registered again by the next call to
+        fill_registry.
+        """
+        with cls.__lock:
+            cls.__registry.clear()
+            cls.__library_index.clear()
+            cls.__label_index.clear()
+            cls.__imported_packages.clear()
+            cls.__parsed_packages.clear()
+            cls.__resolved.clear()
 
     @classmethod
     def create(cls,
@@ -90,61 +234,197 @@ class PackageFactory:
         Raises:
             ValueError: When key is invalid.
         """
+        # Lowercase the requested names once, then resolve the class definition - repeated lookups are cached.
+        names = (cls.__normalize(key), cls.__normalize(library), cls.__normalize(label))
+        class_def = cls.__resolved.get(names)
+        if class_def is None:
+            # Resolve under the lock, so that a concurrent registration can't leave a stale result in the cache.
+            with cls.__lock:
+                class_def = cls.__resolve(names=names, key=key, library=library, label=label)
+                cls.__resolved[names] = class_def
+
+        # Return instantiated and configured class.
+        if not configuration:
+            configuration = {}
+        return class_def(**configuration)
+
+    @classmethod
+    def __resolve(cls,
+                  names: Tuple[str, Optional[str], Optional[str]],
+                  key: str,
+                  library: str = None,
+                  label: str = None) -> type:
+        """
+        Find the class definition registered for a key and the optional library and label filters.
+        Args:
+            names: normalized key, library and label used for the lookup
+            key: name to reference the class from the registry, as requested
+            library: name of library that the application is from, as requested
+            label: label used to identify a class, as requested
+
+        Returns:
+            The registered class definition.
+
+        Raises:
+            ProvidahError: When no unique class is registered for the key and filters.
+        """
+        key_name, library_name, label_name = names
+
         # Find all entries which have the specified key value.
-        entries = [entry for entry in cls.__registry if entry.key == key.lower()]
-        if len(entries) == 0:
-            error_message = f"The key {key} not present."
-            cls.__logger.error(error_message)
-            raise ProvidahError(error_message)
+        bucket = cls.__registry.get(key_name)
+        if bucket is None:
+            error_message = "The key %s not present."
+            cls.__logger.error(error_message, key)
+            raise ProvidahError(error_message, format_args=(key,))
+
+        # Narrow down the (library, label) combinations registered for the key.
+        pairs = bucket.keys()
+        pair_entries = None
 
         # If a library filter was specified, then find all such entries that have that filter
-        if library:
-            entries = [entry for entry in entries if entry.library == library.lower()]
-            if len(entries) == 0:
-                error_message = f"The library {library} not present in for key {key}."
-                cls.__logger.error(error_message)
-                raise ProvidahError(error_message)
+        if library_name:
+            pairs = cls.__library_index.get((key_name, library_name))
+            if not pairs:
+                error_message = "The library %s not present in for key %s."
+                cls.__logger.error(error_message, library, key)
+                raise ProvidahError(error_message, format_args=(library, key))
 
         # If a label filter was specified, then find all such entries that have that filter
-        if label:
-            entries = [entry for entry in entries if entry.label == label.lower()]
-            if len(entries) == 0:
-                error_message = f"The label {label} not present in for key {key}."
-                cls.__logger.error(error_message)
-                raise ProvidahError(error_message)
+        if label_name:
+            if library_name:
+                # The combination of library and label is looked up directly.
+                pair_entries = bucket.get((library_name, label_name))
+                pairs = None if pair_entries is None else ((library_name, label_name),)
+            else:
+                pairs = cls.__label_index.get((key_name, label_name))
+            if not pairs:
+                error_message = "The label %s not present in for key %s."
+                cls.__logger.error(error_message, label, key)
+                raise ProvidahError(error_message, format_args=(label, key))
+
+        if pair_entries is not None:
+            entries = list(pair_entries.values())
+        else:
+            entries = [entry for pair in pairs for entry in bucket[pair].values()]
 
         # If more than one entry was found, then the appropriate filters have not been applied.
         if len(entries) > 1:
-            error_message = f'The combination of key {key}, label {label}, and library {library} did not return a unique result. A total of {len(entries)} ' \
-                            f'possible entries were found'
-            cls.__logger.error(error_message)
-            raise ProvidahError(error_message)
+            error_message = 'The combination of key %s, label %s, and library %s did not return a unique result. A total of %d ' \
+                            'possible entries were found'
+            cls.__logger.error(error_message, key, label, library, len(entries))
+            raise ProvidahError(error_message, format_args=(key, label, library, len(entries)))
 
-        # Return instantiated and configured class.
-        if not configuration:
-            configuration = {}
-        return entries[0].class_def(**configuration)
+        return entries[0].class_def
+
+    @classmethod
+    def dump_registry(cls, path: str) -> None:
+        """
+        Write a snapshot of the registry to a file, so that a later process can use load_registry instead of walking and
+        importing the package tree again. Classes are stored by module and qualified name, along with the modification
+        times of their source files.
+        Args:
+            path: location of the snapshot file
+
+        """
+        entries = []
+        files = {}
+        # Copy the entries under the lock - other threads may be registering classes.
+        with cls.__lock:
+            registered_entries = [entry
+                                  for bucket in cls.__registry.values()
+                                  for pair_entries in bucket.values()
+                                  for entry in pair_entries.values()]
+        for entry in registered_entries:
+            module_name, qualname = cls.__class_path(entry.class_def)
+            if isinstance(entry.class_def, LazyClass):
+                filename = entry.class_def.filename
+            else:
+                filename = getattr(sys.modules.get(module_name), '__file__', None)
+
+            # Classes defined inside of functions, or objects without a module, cannot be looked up again from their module.
+            if module_name is None or '<locals>' in qualname:
+                continue
+
+            entries.append({'key': entry.key,
+                            'module': module_name,
+                            'qualname': qualname,
+                            'filename': filename,
+                            'library': entry.library,
+                            'label': entry.label})
+
+            # Track the source file and its directory - the latter changes when modules are added or removed. Files
+            # which are not on disk, such as modules imported from a zip, can't be tracked.
+            if filename:
+                for tracked_path in (filename, os.path.dirname(filename)):
+                    try:
+                        files[tracked_path] = os.stat(tracked_path).st_mtime_ns
+                    except OSError:
+                        continue
+
+        with open(path, 'w') as snapshot_file:
+            json.dump({'python': list(sys.version_info),
+                       'files': files,
+                       'entries': entries}, snapshot_file)
+
+    @classmethod
+    def load_registry(cls, path: str) -> bool:
+        """
+        Fill the registry from a snapshot written by dump_registry. The classes are only imported when they are first
+        created. Entries which are already registered are kept.
+        Args:
+            path: location of the snapshot file
+
+        Returns:
+            True if the snapshot was loaded, False if it is missing, malformed or out of date - when the python version
+            differs or any of the source files have changed.
+        """
+        try:
+            with open(path) as snapshot_file:
+                snapshot = json.load(snapshot_file)
+
+            if snapshot['python'] != list(sys.version_info):
+                return False
+
+            for tracked_path, mtime in snapshot['files'].items():
+                if os.stat(tracked_path).st_mtime_ns != mtime:
+                    return False
+
+            new_entries = [Entry(key=cls.__normalize(entry['key']),
+                                 class_def=LazyClass(module_name=entry['module'],
+                                                     qualname=entry['qualname'],
+                                                     filename=entry['filename']),
+                                 library=cls.__normalize(entry['library']),
+                                 label=cls.__normalize(entry['label']))
+                           for entry in snapshot['entries']]
+        except (OSError, ValueError, KeyError, TypeError, AttributeError):
+            # Missing files, invalid JSON and snapshots of another layout are all treated as out of date.
+            return False
+
+        cls.__add_entries(new_entries)
+        return True
 
     @classmethod
     def fill_registry(cls, path: str = None,
                       module: str = None,
                       library: str = None,
-                      label: str = None) -> None:
+                      label: str = None,
+                      lazy: bool = False) -> None:
         """
-        Recursive method designed to start from a root path and recursively build
+        Method designed to start from a root path and walk the package tree to build
         out the entire registry of classes from that depth downward for the PackageFactory.
         Args:
             path: package path where modules are located
             module: name of module from which classes will be extracted
             library: name of library that the application is from.
             label: label used to identify a class - possible linked to a monkey-patched version or a sub-application specific class.
+            lazy: when True, classes are found by parsing the module sources and are only imported when they are first created.
 
         """
 
         # First pass through the path shouldn't be specified. This snippet will make sure that the right path is being used.
         if not path:
-            _module = inspect.getmodule(inspect.stack()[1][0])
-            filename = _module.__file__
+            frame = sys._getframe(1)  # pylint: disable=protected-access
+            filename = frame.f_globals.get('__file__') or inspect.getmodule(frame).__file__
             path = Path(filename).parent
 
         # Make sure the root module is correctly specified
@@ -154,24 +434,215 @@ class PackageFactory:
         if not library:
             library = module
 
-        # Location of package
-        pkg_dir = path
+        # Import each non-package module (or parse it, when lazy) and register it.
+        for name_of_package, filename in cls.__walk_package(path=path, module=module):
+            if lazy:
+                cls.__add_lazy_entry_to_registry(label=label,
+                                                 library=library,
+                                                 name_of_package=name_of_package,
+                                                 filename=filename)
+            else:
+                cls.__add_entry_to_registry(label=label,
+                                            library=library,
+                                            name_of_package=name_of_package)
 
-        # Loop over the modules. If it is a package, the make recursive call, otherwise for each non-package
-        # module import the module and register it.
-        for (_, name, is_a_package) in pkgutil.iter_modules([pkg_dir]):
-            pkg_name = f"{module}.{name}"
-            if not is_a_package:
+    @classmethod
+    def warmup(cls,
+               packages: List[str],
+               library: str = None,
+               label: str = None) -> None:
+        """
+        Import the modules of one or more packages concurrently on a thread pool and register their classes, so that the
+        package tree walk is paid for up front rather than by the first create.
+        Args:
+            packages: names of the packages to register
+            library: name of library that the application is from. Defaults to the name of each package.
+            label: label used to identify a class - possible linked to a monkey-patched version or a sub-application specific class.
 
+        Raises:
+            ProvidahError
+        """
+        for package_name in packages:
+            try:
+                package = importlib.import_module(package_name)
+            except Exception as error:
+                error_message = "The package %s could not be imported: %s"
+                cls.__logger.exception(error_message, package_name, error)
+                raise ProvidahError(error_message, format_args=(package_name, error)) from error
+
+            # Walk every location of the package - namespace packages may have several and no __file__.
+            package_paths = getattr(package, '__path__', None)
+            if not package_paths:
+                error_message = "The module %s is not a package."
+                cls.__logger.error(error_message, package_name)
+                raise ProvidahError(error_message, format_args=(package_name,))
+
+            names_of_packages = []
+            for package_path in package_paths:
+                for name_of_package, _ in cls.__walk_package(path=package_path, module=package_name):
+                    names_of_packages.append(name_of_package)
+
+            # Sub-packages are imported first, in order, so that concurrent imports of their modules do not race to
+            # initialize them.
+            sub_packages = sorted({name_of_package.rpartition('.')[0] for name_of_package in names_of_packages},
+                                  key=lambda name: name.count('.'))
+            for sub_package in sub_packages:
+                cls.__import_module_quietly(sub_package)
+
+            with ThreadPoolExecutor(max_workers=min(32, (os.cpu_count() or 1) * 4)) as executor:
+                list(executor.map(cls.__import_module_quietly, names_of_packages))
+
+            # The modules are now imported - registering them in order only reads them from sys.modules.
+            for name_of_package in names_of_packages:
                 cls.__add_entry_to_registry(label=label,
-                                            library=library,
-                                            name_of_package=pkg_name)
-            else:
-                # Make recursive call to the
-                cls.fill_registry(path=os.path.join(pkg_dir, name),
-                                  module=pkg_name,
-                                  library=library,
-                                  label=label)
+                                            library=library or package_name,
+                                            name_of_package=name_of_package)
+
+    @staticmethod
+    def __import_module_quietly(name_of_package: str) -> None:
+        """
+        Import a module, ignoring any failure - it is raised again when the module is registered.
+        Args:
+            name_of_package: Name of the package
+
+        """
+        try:
+            importlib.import_module(name_of_package)
+        except Exception:  # pylint: disable=broad-except
+            pass
+
+    @classmethod
+    def __walk_package(cls, path: str, module: str) -> Iterator[Tuple[str, Optional[str]]]:
+        """
+        Walk a package tree breadth first.
+        Args:
+            path: package path where modules are located
+            module: name of the package at the path
+
+        Returns:
+            Iterator over the name and source file of each non-package module in the tree. The source file is None for
+            modules listed by their importer.
+
+        Raises:
+            ProvidahError
+        """
+        # Packages which are not a directory on disk, such as those imported from a zip, are listed by their importer.
+        if not os.path.isdir(path):
+            yield from cls.__walk_importer_package(path=path, module=module)
+            return
+
+        # Packages left to walk, starting with the location of the root package
+        packages = deque([(path, module)])
+
+        while packages:
+            pkg_dir, pkg_module = packages.popleft()
+            try:
+                with os.scandir(pkg_dir) as dir_entries:
+                    dir_entries = sorted(dir_entries, key=lambda dir_entry: dir_entry.name)
+            except OSError as error:
+                # Sub-packages which can't be listed are skipped, the root package must be readable.
+                if pkg_module != module:
+                    continue
+
+                error_message = "The package %s could not be listed: %s"
+                cls.__logger.exception(error_message, pkg_module, error)
+                raise ProvidahError(error_message, format_args=(pkg_module, error)) from error
+
+            # Sub-directories are queued unchecked - the listing shows whether they are a package.
+            if pkg_module != module and not any(dir_entry.name == '__init__.py' for dir_entry in dir_entries):
+                continue
+
+            module_names = set()
+            for dir_entry in dir_entries:
+                if dir_entry.is_dir():
+                    # Only directories with a valid module name can be imported as a package.
+                    if dir_entry.name.isidentifier():
+                        packages.append((dir_entry.path, f"{pkg_module}.{dir_entry.name}"))
+                    continue
+
+                # Only files with a valid module name can be imported - skips backups and editor lock files.
+                module_name = inspect.getmodulename(dir_entry.name)
+                if not module_name or not module_name.isidentifier() or module_name == '__init__' or module_name in module_names:
+                    continue
+
+                module_names.add(module_name)
+                yield f"{pkg_module}.{module_name}", dir_entry.path
+
+    @staticmethod
+    def __walk_importer_package(path: str, module: str) -> Iterator[Tuple[str, None]]:
+        """
+        Walk a package tree breadth first through the importers of its locations, such as zipimport.
+        Args:
+            path: package path where modules are located
+            module: name of the package at the path
+
+        Returns:
+            Iterator over the name of each non-package module in the tree, along with None for its source file.
+        """
+        # Packages left to walk, starting with the location of the root package
+        packages = deque([(os.fspath(path), module)])
+
+        while packages:
+            pkg_dir, pkg_module = packages.popleft()
+            for (_, name, is_a_package) in pkgutil.iter_modules([pkg_dir]):
+                if is_a_package:
+                    packages.append((os.path.join(pkg_dir, name), f"{pkg_module}.{name}"))
+                else:
+                    yield f"{pkg_module}.{name}", None
+
+    @classmethod
+    def __add_lazy_entry_to_registry(cls, label: str, library: str, name_of_package: str, filename: str) -> None:
+        """
+        Register the classes defined at the top level of a module without importing it. Modules without python source on
+        disk, such as extension modules or modules in a zip, are imported.
+        Args:
+            library: name of library that the application is from.
+            label: label used to identify a class - possible linked to a monkey-patched version or a sub-application specific class.
+            name_of_package: Name of the package
+            filename: source file of the module, or None when it is not known
+
+        Raises:
+            ProvidahError
+        """
+        if not filename or not filename.endswith('.py'):
+            cls.__add_entry_to_registry(label=label, library=library, name_of_package=name_of_package)
+            return
+
+        # Parsing the same module again with the same library and label would only register identical entries, as would
+        # parsing a module which was already imported.
+        parsed_package = (name_of_package, library, label)
+        if parsed_package in cls.__parsed_packages or parsed_package in cls.__imported_packages:
+            return
+
+        try:
+            with open(filename, 'rb') as source_file:
+                tree = ast.parse(source_file.read(), filename=filename)
+        except Exception as error:
+            error_message = "The module %s could not be parsed: %s"
+            cls.__logger.exception(error_message, name_of_package, error)
+            raise ProvidahError(error_message, format_args=(name_of_package, error)) from error
+
+        entry_library = cls.__normalize(library)
+        entry_label = cls.__normalize(label)
+
+        new_entries = []
+        for node in tree.body:
+            if not isinstance(node, ast.ClassDef):
+                continue
+
+            # We don't want anything that is private by intent, nor this factory
+            if node.name.startswith('_') or node.name.lower() == 'packagefactory':
+                continue
+
+            new_entries.append(Entry(key=cls.__normalize(node.name),
+                                     class_def=LazyClass(module_name=name_of_package,
+                                                         qualname=node.name,
+                                                         filename=filename),
+                                     library=entry_library,
+                                     label=entry_label))
+
+        cls.__add_entries(new_entries)
+        cls.__parsed_packages.add(parsed_package)
 
     @classmethod
     def __add_entry_to_registry(cls, label: str, library: str, name_of_package: str) -> None:
@@ -185,30 +656,42 @@ class PackageFactory:
         Raises:
             ProvidahError
         """
+        # Walking the same tree again with the same library and label would only register identical entries.
+        imported_package = (name_of_package, library, label)
+        if imported_package in cls.__imported_packages:
+            return
+
         try:
-            exec('import ' + name_of_package)
+            obj = importlib.import_module(name_of_package)
+
+            # Collect the entries of the module and add them to the registry as one batch.
+            entry_library = cls.__normalize(library)
+            entry_label = cls.__normalize(label)
+            new_entries = []
 
-            obj = sys.modules[name_of_package]
+            # The module namespace already maps each name to its object - no need to sort names or getattr them.
+            for dir_name, class_def in vars(obj).items():
 
-            for dir_name in dir(obj):
+                # We don't want to print in anything that is private by intent or system default, nor this factory
+                if dir_name.startswith('_') or dir_name.lower() == 'packagefactory':
+                    continue
 
-                # We don't want to print in anything that is private by intent or system default
-                if dir_name.startswith('_'):
+                # Only classes can be constructed by the factory - skip constants, functions and imported modules
+                if not inspect.isclass(class_def):
                     continue
 
-                # Get the object
-                class_def = getattr(obj, dir_name)
+                new_entries.append(Entry(key=cls.__normalize(dir_name),
+                                         class_def=class_def,
+                                         library=entry_library,
+                                         label=entry_label))
 
-                # Register the object - but don't register this factory
-                if not dir_name.lower() == 'packagefactory':
-                    PackageFactory.register(key=dir_name.lower(),
-                                            class_def=class_def,
-                                            library=library,
-                                            label=label)
-        except Exception:
+            cls.__add_entries(new_entries)
+            cls.__imported_packages.add(imported_package)
+        except Exception as error:
             # Something seems to have gone wrong. Let's log it and let there be a failure. Silently
             # continuing would make it hard to track where a potential/likely issue in the package
-            # or in the consuming application for which classes are being extracted.
-            error_message = traceback.format_exc()
-            cls.__logger.error(error_message)
-            raise ProvidahError(error_message)
+            # or in the consuming application for which classes are being extracted. The traceback
+            # is kept on the raised error and is only rendered if the log record is emitted.
+            error_message = "The module %s could not be added to the registry: %s"
+            cls.__logger.exception(error_message, name_of_package, error)
+            raise ProvidahError(error_message, format_args=(name_of_package, error)) from error
@@ -18,16 +18,33 @@ class ProvidahError(Exception):
     Error class for providah library.
     """
 
-    def __init__(self, *args):
+    def __init__(self, *args, format_args: tuple = ()):
         """
         Construct ProvidahError
         Args:
             *args: Expected at most length 1. Will be error message if provided.
+            format_args: arguments merged into the message with %-formatting, which is only done when the message is read.
         """
         if args:
-            self.message = args[0]
+            self.__template = args[0]
         else:
-            self.message = None
+            self.__template = None
+        self.__format_args = tuple(format_args)
+
+    @property
+    def message(self) -> str:
+        """
+        Error message, if one was provided.
+        """
+        if self.__format_args:
+            return self.__template % self.__format_args
+
+        return self.__template
+
+    @message.setter
+    def message(self, message: str) -> None:
+        self.__template = message
+        self.__format_args = ()
 
     def __str__(self) -> str:
         if self.message:
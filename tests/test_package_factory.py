@@ -11,7 +11,14 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
-from unittest import TestCase
+import ast
+import importlib
+import json
+import os
+import sys
+import tempfile
+import zipfile
+from unittest import TestCase, mock
 
 from providah.factories.package_factory import PackageFactory
 
@@ -23,6 +30,16 @@ from providah.factories.providah_error import ProvidahError
 
 class TestPackageFactory(TestCase):
 
+    def test_clear_registry(self):
+        PackageFactory.clear_registry()
+        with self.assertRaises(ProvidahError):
+            PackageFactory.create('ClassA', library='tst_pkg')
+
+        PackageFactory.fill_registry(path=os.path.dirname(tst_pkg.__file__))
+        PackageFactory.fill_registry(path=os.path.dirname(tst_pkg_2.__file__))
+        a = PackageFactory.create('ClassA', library='tst_pkg')
+        self.assertIsInstance(a, tst_pkg.lib.class_A.ClassA)
+
     def test_create_class(self):
         a = PackageFactory.create('ClassA', library='tst_pkg')
         self.assertIsInstance(a, tst_pkg.lib.class_A.ClassA)
@@ -40,6 +57,40 @@ class TestPackageFactory(TestCase):
         with self.assertRaises(ProvidahError):
             PackageFactory.create('ClassF', library='tst_pkg')
 
+    def test_same_name_in_library(self):
+        # ClassG is defined by both tst_pkg.lib.class_B and tst_pkg.lib.sublib.class_C
+        with self.assertRaises(ProvidahError):
+            PackageFactory.create('ClassG', library='tst_pkg')
+
+        PackageFactory.fill_registry(path=os.path.dirname(tst_pkg.__file__), library='tst_pkg_lazy_same_name', lazy=True)
+        with self.assertRaises(ProvidahError):
+            PackageFactory.create('ClassG', library='tst_pkg_lazy_same_name')
+
+    def test_function_not_registered(self):
+        with self.assertRaises(ProvidahError):
+            PackageFactory.create('create_a', library='tst_pkg')
+
+    def test_library_not_given(self):
+        PackageFactory.register('ClassE', tst_pkg.lib.class_A.ClassD)
+        e = PackageFactory.create('ClassE')
+        self.assertIsInstance(e, tst_pkg.lib.class_A.ClassD)
+
+        with self.assertRaises(ProvidahError):
+            PackageFactory.create('ClassE', library='none')
+
+    def test_error_message_keeps_requested_names(self):
+        with self.assertRaises(ProvidahError) as context:
+            PackageFactory.create('ClassF', library='tst_pkg')
+        self.assertIn('ClassF', str(context.exception))
+
+    def test_cached_lookup_after_register(self):
+        PackageFactory.register('ClassH', tst_pkg.lib.class_A.ClassA, library='tst_pkg_cache')
+        self.assertIsInstance(PackageFactory.create('ClassH'), tst_pkg.lib.class_A.ClassA)
+
+        PackageFactory.register('ClassH', tst_pkg.lib.class_A.ClassD, library='tst_pkg_cache_2')
+        with self.assertRaises(ProvidahError):
+            PackageFactory.create('ClassH')
+
     def test_library_doesnt_exist(self):
         with self.assertRaises(ProvidahError):
             PackageFactory.create('ClassD', library='some_package')
@@ -52,3 +103,202 @@ class TestPackageFactory(TestCase):
         with self.assertRaises(ProvidahError):
             PackageFactory.create('ClassB')
 
+    def test_register_same_class_twice(self):
+        PackageFactory.register('ClassD', tst_pkg.lib.class_A.ClassD, library='tst_pkg')
+        PackageFactory.register('ClassD', tst_pkg.lib.class_A.ClassD, library='tst_pkg')
+        d = PackageFactory.create('ClassD', library='tst_pkg')
+        self.assertIsInstance(d, tst_pkg.lib.class_A.ClassD)
+
+    def test_dump_and_load_registry(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            snapshot_path = os.path.join(tmp_dir, 'registry.json')
+            PackageFactory.dump_registry(snapshot_path)
+            self.assertTrue(PackageFactory.load_registry(snapshot_path))
+
+            # Register the tst_pkg entries again under another library - these are resolved lazily
+            with open(snapshot_path) as snapshot_file:
+                snapshot = json.load(snapshot_file)
+            snapshot['entries'] = [dict(entry, library='tst_pkg_snapshot') for entry in snapshot['entries'] if entry['library'] == 'tst_pkg']
+            with open(snapshot_path, 'w') as snapshot_file:
+                json.dump(snapshot, snapshot_file)
+
+            self.assertTrue(PackageFactory.load_registry(snapshot_path))
+            a = PackageFactory.create('ClassA', library='tst_pkg_snapshot')
+            self.assertIsInstance(a, tst_pkg.lib.class_A.ClassA)
+
+    def test_load_stale_registry(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            snapshot_path = os.path.join(tmp_dir, 'registry.json')
+            self.assertFalse(PackageFactory.load_registry(snapshot_path))
+
+            PackageFactory.dump_registry(snapshot_path)
+            with open(snapshot_path) as snapshot_file:
+                snapshot = json.load(snapshot_file)
+            snapshot['python'] = [sys.version_info[0] - 1, 0, 0, 'final', 0]
+            with open(snapshot_path, 'w') as snapshot_file:
+                json.dump(snapshot, snapshot_file)
+
+            self.assertFalse(PackageFactory.load_registry(snapshot_path))
+
+    def test_load_registry_with_changed_source(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            source_dir = os.path.join(tmp_dir, 'src')
+            os.makedirs(source_dir)
+            module_path = os.path.join(source_dir, 'snapshot_mod.py')
+            with open(module_path, 'w') as source_file:
+                source_file.write('class SnapshotA:\n    pass\n')
+
+            sys.path.insert(0, source_dir)
+            try:
+                snapshot_mod = importlib.import_module('snapshot_mod')
+            finally:
+                sys.path.remove(source_dir)
+            PackageFactory.register('SnapshotA', snapshot_mod.SnapshotA, library='snapshot_mod')
+
+            snapshot_path = os.path.join(tmp_dir, 'registry.json')
+            PackageFactory.dump_registry(snapshot_path)
+            self.assertTrue(PackageFactory.load_registry(snapshot_path))
+
+            mtime = os.stat(module_path).st_mtime_ns
+            os.utime(module_path, ns=(mtime + 10 ** 9, mtime + 10 ** 9))
+            self.assertFalse(PackageFactory.load_registry(snapshot_path))
+
+        # The module file is gone - it is no longer tracked, but the snapshot can still be written.
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            PackageFactory.dump_registry(os.path.join(tmp_dir, 'registry.json'))
+
+    def test_load_malformed_registry(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            snapshot_path = os.path.join(tmp_dir, 'registry.json')
+            for snapshot in ({'python': list(sys.version_info)}, {'python': list(sys.version_info), 'files': {}, 'entries': [{}]}, []):
+                with open(snapshot_path, 'w') as snapshot_file:
+                    json.dump(snapshot, snapshot_file)
+                self.assertFalse(PackageFactory.load_registry(snapshot_path))
+
+    def test_fill_registry_lazy(self):
+        PackageFactory.fill_registry(path=os.path.dirname(tst_pkg.__file__), module='tst_pkg', library='tst_pkg_lazy', lazy=True)
+        c = PackageFactory.create('ClassC', library='tst_pkg_lazy')
+        self.assertIsInstance(c, tst_pkg.lib.sublib.class_C.ClassC)
+
+        with self.assertRaises(ProvidahError):
+            PackageFactory.create('create_a', library='tst_pkg_lazy')
+
+    def test_fill_registry_lazy_twice(self):
+        path = os.path.dirname(tst_pkg.__file__)
+        PackageFactory.fill_registry(path=path, module='tst_pkg', library='tst_pkg_lazy_twice', lazy=True)
+        with mock.patch('ast.parse', wraps=ast.parse) as parse:
+            PackageFactory.fill_registry(path=path, module='tst_pkg', library='tst_pkg_lazy_twice', lazy=True)
+        self.assertEqual(parse.call_count, 0)
+
+        # An eager fill still imports the modules and replaces the placeholders
+        PackageFactory.fill_registry(path=path, module='tst_pkg', library='tst_pkg_lazy_twice')
+        self.assertIsInstance(PackageFactory.create('ClassC', library='tst_pkg_lazy_twice'), tst_pkg.lib.sublib.class_C.ClassC)
+
+    def test_warmup(self):
+        PackageFactory.warmup(['tst_pkg'], library='tst_pkg_warm')
+        c = PackageFactory.create('ClassC', library='tst_pkg_warm')
+        self.assertIsInstance(c, tst_pkg.lib.sublib.class_C.ClassC)
+
+    def test_warmup_namespace_package(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            os.makedirs(os.path.join(tmp_dir, 'warm_ns_pkg'))
+            with open(os.path.join(tmp_dir, 'warm_ns_pkg', 'warm_a.py'), 'w') as source_file:
+                source_file.write('class WarmA:\n    pass\n')
+
+            sys.path.insert(0, tmp_dir)
+            try:
+                PackageFactory.warmup(['warm_ns_pkg'])
+            finally:
+                sys.path.remove(tmp_dir)
+
+            a = PackageFactory.create('WarmA', library='warm_ns_pkg')
+            self.assertEqual(type(a).__module__, 'warm_ns_pkg.warm_a')
+
+        with self.assertRaises(ProvidahError):
+            PackageFactory.warmup(['json.decoder'])
+
+        with self.assertRaises(ProvidahError) as context:
+            PackageFactory.warmup(['warm_missing_pkg'])
+        self.assertIn("No module named 'warm_missing_pkg'", str(context.exception))
+        self.assertIsInstance(context.exception.__cause__, ImportError)
+
+    def test_fill_registry_skips_invalid_module_names(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            pkg_dir = os.path.join(tmp_dir, 'walk_pkg')
+            os.makedirs(os.path.join(pkg_dir, 'data'))
+            for filename in ('__init__.py', 'walk_a.py', 'walk_a.orig.py', os.path.join('data', 'walk_b.py')):
+                with open(os.path.join(pkg_dir, filename), 'w') as source_file:
+                    source_file.write('class WalkA:\n    pass\n' if filename.startswith('walk_a') else 'class WalkB:\n    pass\n')
+
+            # Dangling editor lock file
+            os.symlink('user@host.1234:1', os.path.join(pkg_dir, '.#walk_a.py'))
+
+            sys.path.insert(0, tmp_dir)
+            try:
+                PackageFactory.fill_registry(path=pkg_dir, library='walk_pkg')
+                PackageFactory.fill_registry(path=pkg_dir, library='walk_pkg_lazy', lazy=True)
+            finally:
+                sys.path.remove(tmp_dir)
+
+            for library in ('walk_pkg', 'walk_pkg_lazy'):
+                a = PackageFactory.create('WalkA', library=library)
+                self.assertEqual(type(a).__module__, 'walk_pkg.walk_a')
+
+                # data has no __init__.py, so it is not a package
+                with self.assertRaises(ProvidahError):
+                    PackageFactory.create('WalkB', library=library)
+
+    def test_fill_registry_skips_unreadable_sub_package(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            pkg_dir = os.path.join(tmp_dir, 'locked_pkg')
+            locked_dir = os.path.join(pkg_dir, 'locked')
+            os.makedirs(locked_dir)
+            for filename in ('__init__.py', os.path.join('locked', '__init__.py'), os.path.join('locked', 'locked_a.py')):
+                with open(os.path.join(pkg_dir, filename), 'w') as source_file:
+                    source_file.write('class LockedA:\n    pass\n')
+
+            scandir = os.scandir
+
+            def locked_scandir(path):
+                if os.fspath(path) == locked_dir:
+                    raise PermissionError(path)
+                return scandir(path)
+
+            with mock.patch('os.scandir', side_effect=locked_scandir):
+                PackageFactory.fill_registry(path=pkg_dir, library='locked_pkg', lazy=True)
+
+            with self.assertRaises(ProvidahError):
+                PackageFactory.create('LockedA', library='locked_pkg')
+
+            # The root package has to be readable
+            locked_dir = pkg_dir
+            with mock.patch('os.scandir', side_effect=locked_scandir):
+                with self.assertRaises(ProvidahError) as context:
+                    PackageFactory.fill_registry(path=pkg_dir, library='locked_pkg')
+            self.assertIsInstance(context.exception.__cause__, PermissionError)
+
+    def test_fill_registry_from_zip(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            archive_path = os.path.join(tmp_dir, 'z.zip')
+            with zipfile.ZipFile(archive_path, 'w') as archive:
+                archive.writestr('zip_pkg/__init__.py', 'from providah.factories.package_factory import PackageFactory\n\nPackageFactory.fill_registry()\n')
+                archive.writestr('zip_pkg/zip_a.py', 'class ZipA:\n    pass\n')
+                archive.writestr('zip_pkg/sub/__init__.py', '')
+                archive.writestr('zip_pkg/sub/zip_b.py', 'class ZipB:\n    pass\n')
+
+            sys.path.insert(0, archive_path)
+            try:
+                importlib.import_module('zip_pkg')
+                PackageFactory.fill_registry(path=os.path.join(archive_path, 'zip_pkg'), library='zip_pkg_lazy', lazy=True)
+                PackageFactory.warmup(['zip_pkg'], library='zip_pkg_warm')
+            finally:
+                sys.path.remove(archive_path)
+
+            for library in ('zip_pkg', 'zip_pkg_lazy', 'zip_pkg_warm'):
+                self.assertEqual(type(PackageFactory.create('ZipA', library=library)).__module__, 'zip_pkg.zip_a')
+                self.assertEqual(type(PackageFactory.create('ZipB', library=library)).__module__, 'zip_pkg.sub.zip_b')
+
+    def test_fill_registry_missing_path(self):
+        PackageFactory.fill_registry(path=os.path.join(tempfile.gettempdir(), 'providah_missing', 'missing_pkg'))
+        with self.assertRaises(ProvidahError):
+            PackageFactory.create('ClassA', library='missing_pkg')
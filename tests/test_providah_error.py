@@ -39,3 +39,20 @@ class TestProvidahError(TestCase):
             raise ProvidahError
         except ProvidahError as ex:
             print(ex)
+
+    def test_format_exception_message(self):
+
+        ex = ProvidahError('The key %s not present.', format_args=('ClassF',))
+        self.assertEqual(ex.message, 'The key ClassF not present.')
+        self.assertEqual(str(ex), 'ProvidahError, The key ClassF not present. ')
+
+    def test_set_exception_message(self):
+
+        ex = ProvidahError('The key %s not present.', format_args=('ClassF',))
+        ex.message = 'Replaced 100%'
+        self.assertEqual(str(ex), 'ProvidahError, Replaced 100% ')
+
+    def test_extra_arguments_ignored(self):
+
+        ex = ProvidahError('Import failed 100%', ValueError('some cause'))
+        self.assertEqual(str(ex), 'ProvidahError, Import failed 100% ')
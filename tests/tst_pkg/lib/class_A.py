@@ -24,3 +24,7 @@ class ClassD:
 
     def __init__(self, **kwargs):
         pass
+
+
+def create_a(**kwargs):
+    return ClassA(**kwargs)
@@ -18,3 +18,9 @@ class ClassB:
 
     def __init__(self, **kwargs):
         self.c = PackageFactory.create('ClassC', library='tst_pkg')
+
+
+class ClassG:
+
+    def __init__(self, **kwargs):
+        pass
@@ -18,3 +18,9 @@ class ClassC:
 
     def __init__(self, **kwargs):
         pass
+
+
+class ClassG:
+
+    def __init__(self, **kwargs):
+        pass